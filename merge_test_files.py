@@ -12,8 +12,10 @@ Utilisation
    python merge_test_files.py
 
 2) Saisir le dossier contenant les CSV et le *préfixe* commun du test (ex.: `test_larves_7`).
-3) Le script détecte, trie et concatène tous les fichiers correspondants.
-4) Le résultat est sauvegardé dans le même dossier sous `<prefix>_merged.csv`.
+3) Le script détecte, trie et concatène tous les fichiers correspondants (écriture en flux,
+   un seul fichier chargé en mémoire à la fois).
+4) Le résultat est sauvegardé dans le même dossier sous `<prefix>_merged.csv` et, si `pyarrow`
+   est installé, `<prefix>_merged.parquet` (voir `WRITE_CSV` / `WRITE_PARQUET`).
 
 Entrées
 -------
@@ -23,7 +25,7 @@ Entrées
 
 Sorties
 -------
-- Fichier CSV fusionné incluant :
+- Fichier CSV (et Parquet, snappy) fusionné incluant :
   - `Absolute_Time` (datetime reconstruit)
   - `Elapsed` et `Elapsed_str` (durée écoulée depuis le début du premier fichier)
 
@@ -31,14 +33,70 @@ Notes
 -----
 - Les fichiers sont triés par la date extraite de leur nom (via `extract_datetime_from_filename`).
 - Les lignes sans `Timestamp` sont ignorées.
+- Une colonne absente de certains fichiers reste vide pour ceux‑ci. Pour le Parquet, le type de chaque
+  colonne (texte ou numérique) est déterminé sur l’ensemble des fichiers avant l’écriture ; en cas
+  d’échec malgré tout, la sortie Parquet est abandonnée (avertissement) et seul le CSV est écrit.
 - Assurez‑vous que tous les fichiers appartiennent au même test et au même format.
 """
 
 # Ce script permet d'unifier les fichiers de données d'un test qui a été arrêté et redémarré, tant qu'ils ont le même nom.
 
-from datetime import timedelta
+import numpy as np
 from utils import *
 
+try:  # Parquet optionnel (nécessite pyarrow)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# --- Formats de sortie ---
+WRITE_CSV = True       # `<prefix>_merged.csv` (format historique)
+WRITE_PARQUET = True   # `<prefix>_merged.parquet` (snappy), ignoré si pyarrow est absent
+
+
+# --- Vectorized Elapsed formatting ("D days HH:MM:SS", same as str(Timedelta) without microseconds) ---
+def format_elapsed(elapsed):
+    secs = elapsed.dt.total_seconds()
+    total_s = np.floor(secs.fillna(0)).astype("int64")
+    days, rem = total_s // 86400, total_s % 86400
+    hours, rem = rem // 3600, rem % 3600
+    minutes, seconds = rem // 60, rem % 60
+    out = (
+        days.astype(str) + " days "
+        + hours.astype(str).str.zfill(2) + ":"
+        + minutes.astype(str).str.zfill(2) + ":"
+        + seconds.astype(str).str.zfill(2)
+    )
+    return out.where(secs.notna(), "NaT")
+
+
+# --- Parquet: stable column types from one file to the next (the writer schema is fixed by the first file) ---
+# Text columns are found over *all* files first (non-sensor columns only), so that a column empty in the
+# first file, or appearing after a restart, is not frozen as the wrong type
+def find_text_columns(filepaths, columns):
+    candidates = {c for c in columns if c not in SENSOR_COLS}
+    text_cols = set()
+    for filepath in filepaths:
+        usecols = [c for c in pd.read_csv(filepath, nrows=0).columns if c.strip() in candidates]
+        part = pd.read_csv(filepath, usecols=usecols)
+        text_cols.update(c.strip() for c in part.columns if not pd.api.types.is_numeric_dtype(part[c]))
+    return text_cols
+
+# Sensors -> float32, text columns -> string, other (numeric or all-empty) columns -> float64
+def normalize_for_parquet(df, text_cols):
+    out = {}
+    for c in df.columns:
+        col = df[c]
+        if pd.api.types.is_datetime64_any_dtype(col) or pd.api.types.is_timedelta64_dtype(col):
+            out[c] = col
+        elif c in SENSOR_COLS:
+            out[c] = col.astype("float32")
+        elif c in text_cols or not (pd.api.types.is_numeric_dtype(col) or col.isna().all()):
+            out[c] = col.astype("string")
+        else:
+            out[c] = pd.to_numeric(col, errors="coerce").astype("float64")
+    return pd.DataFrame(out, index=df.index)
 
 
 # --- Main script ---
@@ -54,15 +112,15 @@ def main():
 
         filename_prefix = input("Entrez le nom du test (sans la date) : ").strip()
 
-        all_files = [
-            f for f in os.listdir(path)
-            if f.startswith(filename_prefix)
-               and f.endswith(".csv")
-               and extract_datetime_from_filename(f) is not None
-        ]
+        # Date extraite une seule fois par fichier (réutilisée pour le tri et la lecture)
+        start_times = {
+            f: extract_datetime_from_filename(f) for f in os.listdir(path)
+            if f.startswith(filename_prefix) and f.endswith(".csv")
+        }
+        start_times = {f: t for f, t in start_times.items() if t is not None}
 
         # Trier par date
-        all_files.sort(key=lambda f: extract_datetime_from_filename(f))
+        all_files = sorted(start_times, key=start_times.get)
 
         if not all_files:
             print("No matching files found.")
@@ -70,45 +128,80 @@ def main():
         else:
             break
 
-    # Sort by datetime embedded in filename
-    all_files.sort(key=lambda f: extract_datetime_from_filename(f))
-
-    dfs = []
-    first_start_time = None
-
-    for filename in all_files:
-        filepath = os.path.join(path, filename)
-        print(f"Reading: {filename}")
-        df = pd.read_csv(filepath)
-
-        # Drop rows with missing Timestamps
-        df = df.dropna(subset=["Timestamp"])
-
-        file_start_time = extract_datetime_from_filename(filename)
-        if file_start_time is None:
-            print(f"Skipping {filename}, couldn't extract datetime.")
-            continue
-
-        if first_start_time is None:
-            first_start_time = file_start_time
-
-        # Compute absolute time and time since first file
-        df["Absolute_Time"] = [
-            file_start_time + timedelta(seconds=ts) for ts in round(df["Timestamp"])
-        ]
-        dfs.append(df)
-
-    # Concatenate all DataFrames
-    merged_df = pd.concat(dfs, ignore_index=True)
-
-    # Compute elapsed time since first file
-    merged_df["Elapsed"] = merged_df["Absolute_Time"] - first_start_time
-    merged_df["Elapsed_str"] = merged_df["Elapsed"].apply(lambda x: str(x).split('.')[0])  # drop microseconds
-
-    # Save to disk
+    # Écriture en flux : un seul fichier en mémoire à la fois
     output_path = os.path.join(path, f"{filename_prefix}_merged.csv")
-    merged_df.to_csv(output_path, index=False)
-    print(f"Fichier unifié sauvegardé en tant que : {output_path}")
+    parquet_path = os.path.join(path, f"{filename_prefix}_merged.parquet")
+    write_parquet = WRITE_PARQUET and pq is not None
+    if WRITE_PARQUET and not write_parquet:
+        print("ℹ️ pyarrow absent : pas de sortie Parquet.")
+    first_start_time = start_times[all_files[0]]
+
+    # Union ordonnée des colonnes de tous les fichiers (en-têtes seulement) : une colonne
+    # apparue après un redémarrage (mise à jour du code) est conservée
+    data_cols = dict.fromkeys(
+        c for f in all_files for c in pd.read_csv(os.path.join(path, f), nrows=0).columns.str.strip()
+    )
+    columns = list(data_cols) + [c for c in ("Absolute_Time", "Elapsed", "Elapsed_str") if c not in data_cols]
+    text_cols = find_text_columns([os.path.join(path, f) for f in all_files], data_cols) if write_parquet else set()
+    header = True
+    out = open(output_path, "w", newline="") if WRITE_CSV else None
+    parquet_writer = None
+
+    try:
+        for filename in all_files:
+            filepath = os.path.join(path, filename)
+            print(f"Reading: {filename}")
+            # Capteurs (SENSOR_COLS) en float32 dès la lecture ; Timestamp garde sa précision
+            df = read_data_csv(filepath)
+
+            # Drop rows with missing Timestamps
+            df = df.dropna(subset=["Timestamp"])
+
+            file_start_time = start_times[filename]
+
+            # Compute absolute time (vectorized: start + elapsed seconds)
+            secs = pd.to_numeric(df["Timestamp"], errors="coerce").round()
+            df["Absolute_Time"] = file_start_time + pd.to_timedelta(secs, unit="s")
+
+            # Compute elapsed time since first file
+            df["Elapsed"] = df["Absolute_Time"] - first_start_time
+            df["Elapsed_str"] = format_elapsed(df["Elapsed"])  # drop microseconds
+
+            # Append to disk (header once, same column order for every file; missing columns left empty)
+            df = df.reindex(columns=columns)
+
+            if out is not None:
+                df.to_csv(out, index=False, header=header)
+            header = False
+
+            if write_parquet:
+                try:
+                    table = pa.Table.from_pandas(normalize_for_parquet(df, text_cols), preserve_index=False)
+                    if parquet_writer is None:
+                        parquet_writer = pq.ParquetWriter(parquet_path, table.schema, compression="snappy")
+                    else:
+                        table = table.cast(parquet_writer.schema)
+                    parquet_writer.write_table(table)
+                except Exception as e:
+                    # Sortie optionnelle : on l’abandonne, le CSV continue
+                    print(f"⚠️  Types incompatibles entre fichiers ({filename}) : pas de sortie Parquet. {e}")
+                    write_parquet = False
+                    if parquet_writer is not None:
+                        parquet_writer.close()
+                        parquet_writer = None
+                    if os.path.exists(parquet_path):
+                        os.remove(parquet_path)
+            del df
+    finally:
+        if out is not None:
+            out.close()
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    if WRITE_CSV:
+        print(f"Fichier unifié sauvegardé en tant que : {output_path}")
+    if write_parquet:
+        print(f"Fichier unifié sauvegardé en tant que : {parquet_path}")
 
 if __name__ == "__main__":
     main()
@@ -2,12 +2,17 @@
 import re
 import time
 import io
+import importlib.util
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from urllib.parse import urljoin
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from dash import Dash, dcc, html, Output, Input, State, no_update
 import plotly.graph_objs as go
 
@@ -27,32 +32,60 @@ REFRESH_MS = 60_000  # 1 min
 CONNECT_TIMEOUT = 1.5
 READ_TIMEOUT = 6.0
 
+# Session HTTP partagée (keep-alive : réutilise les connexions entre les rafraîchissements)
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=len(SERVER_ROOT_URLS), pool_maxsize=8))
+
+# Lecteur CSV : pyarrow (multithread) s’il est installé, sinon moteur C de pandas
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
 # Fenêtre d’affichage (mettre None pour tout afficher)
 PLOT_WINDOW = "48h"   # ex: "24H", "48H" ou None
 
+# Sous-échantillonnage à l’ingestion (moyenne par tranche; None pour désactiver)
+RESAMPLE_RULE = "2min"   # ex: "1min", "5min" ou None
+
 # ------------------ Détection du dernier fichier (par nom) ------------------
 # Ex: 2025-8-5_11h41m45s
 FILENAME_TS_PATTERNS = [
     r'(\d{4})-(\d{1,2})-(\d{1,2})_([0-9]{1,2})h([0-9]{1,2})m([0-9]{1,2})s'
 ]
 
+_FILENAME_TS_RES = [re.compile(p) for p in FILENAME_TS_PATTERNS]
+
+@lru_cache(maxsize=4096)
 def ts_from_name(name: str):
-    for pat in FILENAME_TS_PATTERNS:
-        m = re.search(pat, name)
+    for pat in _FILENAME_TS_RES:
+        m = pat.search(name)
         if m:
             y, mo, d, h, mi, s = (int(x) for x in m.groups())
             return datetime(y, mo, d, h, mi, s)
     return None
 
-CSV_HREF_RE = re.compile(r'href="([^"]+\.csv)"', re.IGNORECASE)
+def parse_csv_hrefs(html_text: str):
+    """Extrait les basenames des liens `href="….csv"` d’un listing simple (str.find, sans regex)."""
+    names = []
+    lower = html_text.lower()  # attributs insensibles à la casse (HREF=…), découpe dans le texte d’origine
+    i = 0
+    while True:
+        j = lower.find('href="', i)
+        if j < 0:
+            break
+        k = html_text.find('"', j + 6)
+        if k < 0:
+            break
+        href = html_text[j + 6:k]
+        if href.lower().endswith(".csv"):
+            names.append(href.rpartition("/")[2])
+        i = k + 1
+    return names
 
 def list_csvs_fast(root: str, limit: int = 400):
-    """1 GET + regex → liste des CSV (basenames). Rapide."""
+    """1 GET + scan des liens → liste des CSV (basenames). Rapide."""
     try:
-        r = requests.get(root, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        r = SESSION.get(root, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
         r.raise_for_status()
-        hrefs = CSV_HREF_RE.findall(r.text)
-        names = [h.split("/")[-1] for h in hrefs]
+        names = parse_csv_hrefs(r.text)
         if len(names) > limit:
             names = names[-limit:]
         return names
@@ -62,25 +95,28 @@ def list_csvs_fast(root: str, limit: int = 400):
 def get_latest_csv_filename_fast():
     """Retourne le nom du CSV le plus récent selon la date dans le nom (fallback lexicographique)."""
     best_name, best_dt, lex_fallback = None, None, None
-    for root in SERVER_ROOT_URLS:
-        names = list_csvs_fast(root)
-        if not names:
-            continue
-
-        # fallback lexicographique au cas où
-        local_lex = max(names)
-        if (lex_fallback is None) or (local_lex > lex_fallback):
-            lex_fallback = local_lex
-
-        for n in names:
-            dt = ts_from_name(n)
-            if dt is None:
+    # Listings lancés en parallèle, consommés dans l’ordre des IP : on s’arrête dès la première
+    # IP qui fournit un fichier daté, sans attendre les IP plus lentes / mortes
+    ex = ThreadPoolExecutor(max_workers=len(SERVER_ROOT_URLS))
+    try:
+        for names in ex.map(list_csvs_fast, SERVER_ROOT_URLS):
+            if not names:
                 continue
-            if (best_dt is None) or (dt > best_dt):
-                best_dt, best_name = dt, n
 
-        if best_name is not None:
-            break
+            # Un seul passage : fallback lexicographique + date la plus récente
+            for n in names:
+                if (lex_fallback is None) or (n > lex_fallback):
+                    lex_fallback = n
+                dt = ts_from_name(n)
+                if dt is None:
+                    continue
+                if (best_dt is None) or (dt > best_dt):
+                    best_dt, best_name = dt, n
+
+            if best_name is not None:
+                break
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
 
     if best_name:
         return best_name
@@ -89,39 +125,80 @@ def get_latest_csv_filename_fast():
     raise RuntimeError("Aucun fichier CSV trouvé sur les serveurs.")
 
 # ------------------ Récupération du CSV ------------------
+# Métadonnées HTTP du dernier téléchargement par URL (pour les GET conditionnels)
+_HTTP_META: dict = {}
+
+def _fetch_from_root(root, filename):
+    """GET (conditionnel si possible) sur une IP; renvoie (bytes|None, content_length, root)."""
+    url = urljoin(root, filename)
+    meta = _HTTP_META.get(url)
+    headers = {}
+    # GET conditionnel seulement si la version correspondante est déjà en cache
+    if meta and (filename, meta["content_length"]) in _DF_CACHE:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    resp = SESSION.get(url, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    if resp.status_code == 304 and headers:
+        return None, meta["content_length"], root
+    resp.raise_for_status()
+    content = resp.content
+    clen = resp.headers.get("Content-Length")
+    content_length = int(clen) if (clen and str(clen).isdigit()) else len(content)
+    _HTTP_META[url] = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "content_length": content_length,
+    }
+    return content, content_length, root
+
 def fetch_csv_first_alive(filename):
-    """Essaie chaque IP; renvoie (bytes, content_length, root) ou (None, None, err)."""
+    """Interroge toutes les IP en parallèle; renvoie la 1re réponse valide
+    (bytes, content_length, root) ou (None, None, err).
+    Si le serveur répond 304 (fichier inchangé), renvoie (None, content_length, root)."""
     last_err = None
-    for root in SERVER_ROOT_URLS:
-        url = urljoin(root, filename)
-        try:
-            resp = requests.get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
-            resp.raise_for_status()
-            content = resp.content
-            clen = resp.headers.get("Content-Length")
-            content_length = int(clen) if (clen and str(clen).isdigit()) else len(content)
-            return content, content_length, root
-        except Exception as e:
-            last_err = e
-            continue
+    ex = ThreadPoolExecutor(max_workers=len(SERVER_ROOT_URLS))
+    try:
+        futs = [ex.submit(_fetch_from_root, root, filename) for root in SERVER_ROOT_URLS]
+        for fut in as_completed(futs):
+            try:
+                return fut.result()
+            except Exception as e:
+                last_err = e
+    finally:
+        # Ne pas attendre les IP plus lentes
+        ex.shutdown(wait=False, cancel_futures=True)
     return None, None, last_err
 
 # ------------------ Prétraitement minimal ------------------
 def coerce_timestamp(df: pd.DataFrame, start_iso: str) -> pd.DataFrame:
-    """Timestamp (secondes écoulées) → datetimes réels = start + secondes."""
+    """Timestamp (secondes écoulées) → datetimes réels = start + secondes (modifie `df` en place)."""
     if "Timestamp" not in df.columns or not start_iso:
         return df
     try:
         start_dt = datetime.fromisoformat(start_iso)
     except Exception:
         return df
-    df = df.copy()
-    secs = pd.to_numeric(df["Timestamp"], errors="coerce")
-    df["Timestamp"] = start_dt + pd.to_timedelta(secs, unit="s")
+    secs = pd.to_numeric(df["Timestamp"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    # Arithmétique int64 directe (ns) ; NaN → NaT
+    valid = ~np.isnan(secs)
+    ns = np.full(secs.shape, np.iinfo("int64").min, dtype="int64")
+    ns[valid] = pd.Timestamp(start_dt).value + (secs[valid] * 1e9).astype("int64")
+    df["Timestamp"] = ns.view("datetime64[ns]")
     return df
 
+def downsample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """Moyenne par tranche de temps fixe (groupby sur un entier, plus léger que resample)."""
+    df = df[df["Timestamp"].notna()]
+    bucket_ns = pd.Timedelta(rule).value
+    keys = df["Timestamp"].to_numpy("datetime64[ns]").view("i8") // bucket_ns
+    out = df.drop(columns="Timestamp").groupby(keys).mean(numeric_only=True)
+    out.insert(0, "Timestamp", pd.to_datetime(out.index.to_numpy() * bucket_ns, unit="ns"))
+    return out.reset_index(drop=True)
+
 def preprocess(df: pd.DataFrame, start_iso: str) -> pd.DataFrame:
-    df = df.copy()
+    """Modifie `df` en place (DataFrame fraîchement lu, propre au callback)."""
     df.columns = df.columns.str.strip()
     # Conversion du temps
     df = coerce_timestamp(df, start_iso)
@@ -131,8 +208,17 @@ def preprocess(df: pd.DataFrame, start_iso: str) -> pd.DataFrame:
 
     # Fenêtre d’affichage optionnelle
     if PLOT_WINDOW and "Timestamp" in df.columns and pd.api.types.is_datetime64_any_dtype(df["Timestamp"]):
-        cutoff = df["Timestamp"].max() - pd.Timedelta(PLOT_WINDOW)
-        df = df[df["Timestamp"] >= cutoff]
+        ts = df["Timestamp"]
+        cutoff = ts.max() - pd.Timedelta(PLOT_WINDOW)
+        if ts.is_monotonic_increasing:
+            # Données triées : recherche binaire + une seule tranche (pas de masque booléen)
+            df = df.iloc[ts.searchsorted(cutoff):]
+        else:
+            df = df[ts >= cutoff]
+
+    # Sous-échantillonnage optionnel
+    if RESAMPLE_RULE and "Timestamp" in df.columns and pd.api.types.is_datetime64_any_dtype(df["Timestamp"]):
+        df = downsample(df, RESAMPLE_RULE)
 
     return df
 
@@ -164,6 +250,31 @@ def build_figs(df: pd.DataFrame):
         )
     return temp_fig, humi_fig
 
+# ------------------ Cache en mémoire (évite de re-parser un CSV inchangé) ------------------
+# Clé : (nom du fichier, taille en octets) → DataFrame déjà prétraité
+# Les octets téléchargés sont parsés directement en mémoire (io.BytesIO), sans passer par le disque.
+_DF_CACHE: dict = {}
+
+def read_plot_columns(content):
+    """Lit uniquement Timestamp + colonnes tracées (noms réels de l’en-tête, espaces compris)."""
+    wanted = {"Timestamp", *TEMP_COLS, *HUMI_COLS}
+    header = pd.read_csv(io.BytesIO(content), nrows=0).columns
+    usecols = [c for c in header if c.strip() in wanted]
+    # Fichier en cours d’écriture : on ignore une éventuelle dernière ligne incomplète
+    content = content[:content.rfind(b"\n") + 1] or content
+    return pd.read_csv(io.BytesIO(content), usecols=usecols, engine=CSV_ENGINE)
+
+def load_df_cached(filename, content, content_length, start_iso):
+    """Parse + prétraitement seulement si (fichier, taille) a changé depuis le dernier tick."""
+    key = (filename, content_length)
+    df = _DF_CACHE.get(key)
+    if df is None:
+        df = read_plot_columns(content)
+        df = preprocess(df, start_iso)
+        _DF_CACHE.clear()  # ne garder que la dernière version
+        _DF_CACHE[key] = df
+    return df
+
 # ------------------ Dash (minimal) ------------------
 app = Dash(__name__)
 app.title = "Climate Monitor (simple)"
@@ -173,6 +284,7 @@ app.layout = html.Div(
     children=[
         dcc.Store(id="filename-store"),
         dcc.Store(id="starttime-store"),
+        dcc.Store(id="rendered-store"),  # clé de la version affichée (quelques octets)
         html.H2("Illuscens — Température & Humidité (auto, dernier fichier)"),
         html.Div(id="status-bar", style={
             "padding": "10px 12px", "background": "#f4f6f8", "border": "1px solid #e1e5ea",
@@ -202,33 +314,37 @@ def discover_once(n, stored_filename):
     except Exception:
         return no_update, no_update
 
-# 2) Rafraîchir les graphiques
+# 2) Rafraîchir les graphiques (figures renvoyées au navigateur seulement si les données ont changé)
 @app.callback(
     Output("temp-graph", "figure"),
     Output("humi-graph", "figure"),
     Output("status-bar", "children"),
+    Output("rendered-store", "data"),
     Input("refresh", "n_intervals"),
     State("filename-store", "data"),
     State("starttime-store", "data"),
+    State("rendered-store", "data"),
     prevent_initial_call=False,
 )
-def update_plots(n, filename, start_iso):
+def update_plots(n, filename, start_iso, rendered_key):
     if not filename:
-        return go.Figure(), go.Figure(), "⏳ Recherche du dernier fichier…"
+        return go.Figure(), go.Figure(), "⏳ Recherche du dernier fichier…", None
 
     # Télécharger depuis la 1re IP disponible
     content, content_length, origin = fetch_csv_first_alive(filename)
-    if content is None:
-        return go.Figure(), go.Figure(), "❌ Aucun serveur accessible."
+    if content_length is None:
+        return go.Figure(), go.Figure(), "❌ Aucun serveur accessible.", None
 
-    # Lire uniquement les colonnes utiles (plus rapide)
-    wanted = {"Timestamp", *TEMP_COLS, *HUMI_COLS}
-    df = pd.read_csv(io.BytesIO(content), usecols=lambda c: c.strip() in wanted)
-    df = preprocess(df, start_iso)
+    status = f"🌐 Source: {origin} • Fichier: {filename} • Maj: {time.strftime('%H:%M:%S')}"
+    key = f"{filename}:{content_length}"
+    if key == rendered_key:
+        # Ce client affiche déjà cette version : ne renvoyer que le statut
+        return no_update, no_update, status, no_update
+
+    df = load_df_cached(filename, content, content_length, start_iso)
 
     tfig, hfig = build_figs(df)
-    status = f"🌐 Source: {origin} • Fichier: {filename} • Maj: {time.strftime('%H:%M:%S')}"
-    return tfig, hfig, status
+    return tfig, hfig, status, key
 
 if __name__ == "__main__":
     webbrowser.open_new("http://127.0.0.1:8050/")
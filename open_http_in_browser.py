@@ -1,8 +1,8 @@
 """
 Résumé
 ------
-Teste une liste d’adresses IP d’un serveur HTTP (Raspberry Pi) et ouvre la première
-qui répond dans le navigateur, à la racine (listing des fichiers).
+Teste en parallèle une liste d’adresses IP d’un serveur HTTP (Raspberry Pi) et ouvre la
+première qui répond dans le navigateur, à la racine (listing des fichiers).
 
 Utilisation
 ----------
@@ -12,6 +12,7 @@ Personnalisation
 ----------------
 - Modifier la liste `IP_ADDRESSES` si de nouvelles adresses sont possibles.
 - Adapter le chemin ouvert (`f"{ip}/"`) si nécessaire (ex.: sous-dossier).
+- `PROBE_TIMEOUT` : délai max (s) par tentative.
 
 Sorties
 -------
@@ -19,6 +20,8 @@ Sorties
 - Affiche en console le résultat de chaque tentative.
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 import webbrowser
 
@@ -30,22 +33,37 @@ IP_ADDRESSES = [
     "http://172.20.202.182:8080"
 ]
 
+# Short timeout so a dead IP does not stall the probe
+PROBE_TIMEOUT = 1.0
+
+
+# Function to check one server (HEAD: no need to download the listing)
+def probe(ip):
+    response = requests.head(f"{ip}/", timeout=PROBE_TIMEOUT)  # Modify to the correct path if necessary
+    response.raise_for_status()  # Check if the request was successful
+    return ip
+
 
-# Function to check the server and open the link in the browser
+# Function to check the servers in parallel and open the first one that answers in the browser
 def open_browser_with_file_list():
-    for ip in IP_ADDRESSES:
-        try:
-            # Attempt to fetch the directory listing from the server
-            response = requests.get(f"{ip}/")  # Modify to the correct path if necessary
-            response.raise_for_status()  # Check if the request was successful
+    ex = ThreadPoolExecutor(max_workers=len(IP_ADDRESSES))
+    try:
+        futures = {ex.submit(probe, ip): ip for ip in IP_ADDRESSES}
+        for fut in as_completed(futures):
+            ip = futures[fut]
+            try:
+                fut.result()
+            except requests.RequestException as e:
+                print(f"Failed to reach {ip}: {e}")
+                continue
 
             # If the server is reachable, open the URL in the browser
             print(f"Successfully reached the server at {ip}. Opening in browser...")
             webbrowser.open(f"{ip}/")  # Open the server's directory listing in the default browser
             break  # Exit the loop once a working IP is found
-        except requests.RequestException as e:
-            print(f"Failed to reach {ip}: {e}")
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
 
 
 # Run the function to try opening the directory listing
-open_browser_with_file_list()
+open_browser_with_file_list()
\ No newline at end of file
@@ -11,6 +11,8 @@ python plot_Température_Humidité.py
 
 - Indiquez le CSV et le dossier de sauvegarde quand demandé.
 - La figure est affichée et enregistrée sous `Température_Humidité.html`.
+- Obsolète en ligne de commande : préférer `plot_all.py` (un seul chargement du CSV) ;
+  `make_overview_figure(df)` reste importable.
 
 Paramètres clés
 ---------------
@@ -28,7 +30,7 @@ Sorties
 - Figure Plotly interactive affichée et écrite en HTML dans le dossier indiqué.
 """
 
-from datetime import timedelta
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
@@ -38,6 +40,27 @@ from utils import *
 OVERVIEW_RESAMPLE = "30min"   # e.g. "5min", "15min", "30min", "1H"
 OVERVIEW_SMOOTH   = "2h"      # time-based rolling window, centered
 
+# Signal -> (legend name, subplot row, secondary y-axis, line style)
+OVERVIEW_TRACES = {
+    # Subplot 1: Temperature & Heater
+    "Target_T":         ('Température cible', 1, False, None),
+    "Sheath_T":         ('Température gaine', 1, False, None),
+    "Chamber_T_avg":    ('Température chambre', 1, False, None),
+    "Heater_Power":     ('Heater Power', 1, True, None),
+    # Subplot 2: Humidity & Humidifier
+    "Target_RH":        ('Humidité cible', 2, False, None),
+    "Sheath_RH":        ('Humidité gaine', 2, False, None),
+    "Chamber_RH_avg":   ('Humidité chambre', 2, False, None),
+    "Humidifier_Power": ('Humidifier Power', 2, True, None),
+    # Subplot 3: Recirculation & Intake
+    "Total_CFM":        ("Débit d'air", 3, False, None),
+    "Target_Ratio":     ('Recirc. cible', 3, False, dict(dash='dash')),
+    "Recycling_Ratio":  ('Ratio de recirc.', 3, False, None),
+    "Intake_Temp":      ('Température (intake)', 3, False, dict(dash='dot')),
+    "Intake_Hum":       ('Humidité (intake)', 3, False, dict(dash='dot')),
+    "Ammonia":          ('Ammoniac', 3, True, None),
+}
+
 def make_overview_figure(df, resample_rule=OVERVIEW_RESAMPLE, smooth_window=OVERVIEW_SMOOTH):
     """
     Create an overview figure on the entire test:
@@ -48,13 +71,8 @@ def make_overview_figure(df, resample_rule=OVERVIEW_RESAMPLE, smooth_window=OVER
     # Ensure datetime index for time-based ops
     df_idx = df.set_index(pd.to_datetime(df["Absolute_Time"])).sort_index()
 
-    # Columns to include (subset used in day plots)
-    cols = [
-        "Target_T", "Sheath_T", "Chamber_T_avg", "Heater_Power", "Ammonia",
-        "Target_RH", "Sheath_RH", "Chamber_RH_avg", "Humidifier_Power",
-        "Total_CFM", "Target_Ratio", "Recycling_Ratio", "Intake_Temp", "Intake_Hum"
-    ]
-    cols = [c for c in cols if c in df_idx.columns]  # keep only existing
+    # Columns to include (subset used in day plots), in trace order
+    cols = [c for c in OVERVIEW_TRACES if c in df_idx.columns]  # keep only existing
 
     # Resample with mean for numeric columns
     df_res = df_idx[cols].resample(resample_rule).mean()
@@ -73,40 +91,17 @@ def make_overview_figure(df, resample_rule=OVERVIEW_RESAMPLE, smooth_window=OVER
         ]
     )
 
-    # --- Subplot 1: Temperature & Heater ---
-    if "Target_T" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Target_T"], name='Température cible'), row=1, col=1)
-    if "Sheath_T" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Sheath_T"], name='Température gaine'), row=1, col=1)
-    if "Chamber_T_avg" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Chamber_T_avg"], name='Température chambre'), row=1, col=1)
-    if "Heater_Power" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Heater_Power"], name='Heater Power'), row=1, col=1, secondary_y=True)
-
-
-    # --- Subplot 2: Humidity & Humidifier ---
-    if "Target_RH" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Target_RH"], name='Humidité cible'), row=2, col=1)
-    if "Sheath_RH" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Sheath_RH"], name='Humidité gaine'), row=2, col=1)
-    if "Chamber_RH_avg" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Chamber_RH_avg"], name='Humidité chambre'), row=2, col=1)
-    if "Humidifier_Power" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Humidifier_Power"], name='Humidifier Power'), row=2, col=1, secondary_y=True)
-
-    # --- Subplot 3: Recirculation & Intake ---
-    if "Total_CFM" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Total_CFM"], name="Débit d'air"), row=3, col=1)
-    if "Target_Ratio" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Target_Ratio"], name='Recirc. cible', line=dict(dash='dash')), row=3, col=1)
-    if "Recycling_Ratio" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Recycling_Ratio"], name='Ratio de recirc.'), row=3, col=1)
-    if "Intake_Temp" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Intake_Temp"], name='Température (intake)', line=dict(dash='dot')), row=3, col=1)
-    if "Intake_Hum" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Intake_Hum"], name='Humidité (intake)', line=dict(dash='dot')), row=3, col=1)
-    if "Ammonia" in df_smooth:
-        fig.add_trace(go.Scattergl(x=df_smooth.index, y=df_smooth["Ammonia"], name='Ammoniac'), row=3, col=1, secondary_y=True)
+    # --- Traces (only existing columns, already filtered in `cols`), added in one batch ---
+    # Compact arrays (float32 values, ms datetimes) halve the data embedded in the HTML
+    x = df_smooth.index.values.astype("datetime64[ms]")
+    traces, rows, secondary_ys = [], [], []
+    for c in cols:
+        name, row, secondary_y, line = OVERVIEW_TRACES[c]
+        y = df_smooth[c].to_numpy(dtype=np.float32)
+        traces.append(go.Scattergl(x=x, y=y, name=name, line=line))
+        rows.append(row)
+        secondary_ys.append(secondary_y)
+    fig.add_traces(traces, rows=rows, cols=[1] * len(traces), secondary_ys=secondary_ys)
 
     # Axis titles & layout
     fig.update_layout(height=900, title_text="Aperçu global — test complet", showlegend=True)
@@ -125,42 +120,14 @@ def make_overview_figure(df, resample_rule=OVERVIEW_RESAMPLE, smooth_window=OVER
 
     return fig
 
-# --- Demande à l'utilisateur ---
-chemin_fichier = input("Entrez le chemin complet du fichier CSV de données : ").strip().strip('"').strip("'")
-while not os.path.isfile(chemin_fichier):
-    print("❌ Fichier introuvable. Veuillez réessayer.")
-    chemin_fichier = input("Entrez le chemin complet du fichier CSV de données : ").strip().strip('"').strip("'")
-
-
-dossier_figures = input("Entrez le chemin du dossier où sauvegarder la figure : ").strip().strip('"').strip("'")
-while not os.path.isdir(dossier_figures):
-    print("❌ Dossier introuvable. Veuillez réessayer.")
-    dossier_figures = input("Entrez le chemin du dossier où sauvegarder la figure : ").strip().strip('"').strip("'")
-
-# --- Chargement des données ---
-df = pd.read_csv(chemin_fichier)
-df.columns = df.columns.str.strip()
-
-# --- Traitement du temps ---
-if 'Absolute_Time' in df.columns:
-    df['Absolute_Time'] = pd.to_datetime(df['Absolute_Time'])
-else:
-    filename = os.path.basename(chemin_fichier)
-    file_start_time = extract_datetime_from_filename(filename)
-    if file_start_time is None:
-        file_start_time = timedelta(seconds=0)
-
-    df["Absolute_Time"] = [ file_start_time + timedelta(hours=1) + timedelta(seconds=ts) for ts in round(df["Timestamp"]) ]
-
-start_time = df['Absolute_Time'].min()
-df['Elapsed_Hours'] = (df['Absolute_Time'] - start_time).dt.total_seconds() / 3600
-df['Day'] = df['Elapsed_Hours'].floordiv(24).astype(int)
-
-# --- Calcul des moyennes ---
-df['Chamber_T_avg'] = df[['Chamber_top_T', 'Chamber_bottom_T']].mean(axis=1)
-df['Chamber_RH_avg'] = df[['Chamber_top_RH', 'Chamber_bottom_RH']].mean(axis=1)
+if __name__ == "__main__":
+    # --- Demande à l'utilisateur ---
+    chemin_fichier = prompt_path("Entrez le chemin complet du fichier CSV de données : ", must_be="file")
+    dossier_figures = prompt_path("Entrez le chemin du dossier où sauvegarder la figure : ", must_be="dir")
 
+    # --- Chargement des données (temps absolu + moyennes, cache Parquet) ---
+    df = load_test_data(chemin_fichier)
 
-fig_overview = make_overview_figure(df, OVERVIEW_RESAMPLE, OVERVIEW_SMOOTH)
-fig_overview.show()
-fig_overview.write_html(f"{dossier_figures}/Température_Humidité.html")
\ No newline at end of file
+    fig_overview = make_overview_figure(df, OVERVIEW_RESAMPLE, OVERVIEW_SMOOTH)
+    fig_overview.show()
+    fig_overview.write_html(f"{dossier_figures}/Température_Humidité.html", **HTML_EXPORT_OPTIONS)
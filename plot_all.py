@@ -0,0 +1,48 @@
+"""
+Résumé
+------
+Point d’entrée unique pour les figures d’un test complet : le CSV est lu et préparé
+*une seule fois* (`load_test_data`), puis sont générées :
+- l’aperçu global (`Température_Humidité.html`, cf. `plot_Température_Humidité.py`),
+- l’évaporation (`Évaporation.html`, cf. `plot_evaporation.py`).
+
+Utilisation
+----------
+python plot_all.py
+
+- Indiquez le CSV et le dossier de sauvegarde quand demandé.
+- Les deux figures sont enregistrées en HTML dans le dossier indiqué (puis affichées).
+"""
+
+import os
+
+from utils import *
+from plot_Température_Humidité import make_overview_figure
+from plot_evaporation import make_evaporation_figure
+
+
+def main():
+    # --- Demande à l'utilisateur ---
+    chemin_fichier = prompt_path("Entrez le chemin complet du fichier CSV de données : ", must_be="file")
+    dossier_figures = prompt_path("Entrez le chemin du dossier où sauvegarder les figures : ", must_be="dir")
+
+    # --- Chargement des données (une seule lecture pour toutes les figures) ---
+    df = load_test_data(chemin_fichier)
+
+    figures = {
+        "Température_Humidité.html": make_overview_figure(df),
+        "Évaporation.html": make_evaporation_figure(df),
+    }
+
+    # --- Sauvegarde et affichage ---
+    for name, fig in figures.items():
+        fig_path = os.path.join(dossier_figures, name)
+        fig.write_html(fig_path, **HTML_EXPORT_OPTIONS)
+        print(f"✅ Figure sauvegardée : {fig_path}")
+
+    for fig in figures.values():
+        fig.show(config={"responsive": True})
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
-import datetime
-import matplotlib.pyplot as plt
+import numpy as np
 
 from utils import *
 
+# Colonnes réellement tracées (les autres ne sont pas parsées)
+NEEDED = (
+    "Timestamp",
+    "Target_T", "Sheath_T", "Chamber_top_T", "Chamber_bottom_T", "Mobile_T", "Heater_Power",
+    "Target_RH", "Sheath_RH", "Chamber_top_RH", "Chamber_bottom_RH", "Mobile_RH", "Humidifier_Power",
+    "Total_CFM", "Recycling_Ratio", "Intake_Temp", "Intake_Hum",
+    "Ammonia", "Weight",
+)
+
 
 def main():
     try:
@@ -18,103 +26,109 @@ def main():
             return
 
     try:
-        df, source = fetch_csv(csv_url)
+        df, source = fetch_csv(csv_url, usecols=NEEDED)
         df.columns = df.columns.str.strip()
 
+        # Plotly importé seulement une fois les données disponibles (démarrage / saisie manuelle plus rapides)
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
         # Convertir 'Timestamp' en datetime
         file_start_time = extract_datetime_from_filename(csv_url)
-        df["Time"] = [
-            file_start_time + datetime.timedelta(hours=1) + datetime.timedelta(seconds=ts)
-            for ts in round(df["Timestamp"])
-        ]  # +1 heure à cause de l'heure du Raspberry Pi
+        base = file_start_time + pd.Timedelta(hours=1)  # +1 heure à cause de l'heure du Raspberry Pi
+        df["Time"] = times_from_seconds(base, df["Timestamp"])
 
         # Moyennes
-        df['Chamber_T_avg'] = df[['Chamber_top_T', 'Chamber_bottom_T']].mean(axis=1)
-        df['Chamber_RH_avg'] = df[['Chamber_top_RH', 'Chamber_bottom_RH']].mean(axis=1)
-
-        df = df.set_index(df['Time'])
+        df['Chamber_T_avg'] = mean_pair(df['Chamber_top_T'], df['Chamber_bottom_T'])
+        df['Chamber_RH_avg'] = mean_pair(df['Chamber_top_RH'], df['Chamber_bottom_RH'])
+
+        df.set_index("Time", inplace=True)  # la colonne devient l'index (pas de copie en double)
+
+        # --- Figure unique (Plotly WebGL) : 4 sous-graphes à axe temporel partagé ---
+        fig = make_subplots(
+            rows=4, cols=1, shared_xaxes=True,
+            specs=[[{"secondary_y": True}]] * 4,
+            subplot_titles=[
+                "Températures et puissance de chauffe dans le temps",
+                "Humidité et puissance de l’humidificateur dans le temps",
+                "Stratégie de recirculation dans le temps",
+                "Évolution de l'ammoniac et du poids",
+            ],
+        )
+        t = df.index.values
+
+        def xy(values):
+            # Trace décimée (min/max, ~2000 points) en tableaux compacts pour WebGL
+            x, y = to_webgl_arrays(*decimate_minmax(t, values))
+            return dict(x=x, y=y)
+
+        # Traces collectées puis ajoutées en un seul appel (une seule passe de validation / mise en page)
+        traces, rows, secondary_ys = [], [], []
+
+        def add(trace, row, secondary_y=False):
+            traces.append(trace)
+            rows.append(row)
+            secondary_ys.append(secondary_y)
 
         # --- Graphe 1 : Températures et puissance de chauffe ---
-        fig1, (ax1_temp, ax1_power) = plt.subplots(2, 1, sharex=True, figsize=(10, 6))
-
-        ax1_temp.plot(df['Time'], df['Target_T'], label='Cible')
-        ax1_temp.plot(df['Time'], df['Sheath_T'], label='Gaine')
-        ax1_temp.plot(df['Time'], df['Chamber_T_avg'], label='Pièce')
-        ax1_temp.plot(df['Time'], df['Mobile_T'], label='Larves')
-        ax1_temp.set_ylabel("Température (°C)")
-        ax1_temp.set_title("Températures et puissance de chauffe dans le temps")
-        ax1_temp.legend()
-
-        ax1_power.plot(df['Time'], df['Heater_Power'], label='Puissance chauffage', color='tab:red')
-        ax1_power.set_ylabel("Puissance (%)")
-        ax1_power.set_xlabel("Temps")
-        ax1_power.legend()
-
-        fig1.autofmt_xdate()
+        add(go.Scattergl(**xy(df['Target_T']), name='Cible'), 1)
+        add(go.Scattergl(**xy(df['Sheath_T']), name='Gaine'), 1)
+        add(go.Scattergl(**xy(df['Chamber_T_avg']), name='Pièce'), 1)
+        add(go.Scattergl(**xy(df['Mobile_T']), name='Larves'), 1)
+        add(go.Scattergl(**xy(df['Heater_Power']), name='Puissance chauffage',
+                         line=dict(color='red')), 1, secondary_y=True)
+        fig.update_yaxes(title_text="Température (°C)", row=1, col=1, secondary_y=False)
+        fig.update_yaxes(title_text="Puissance (%)", row=1, col=1, secondary_y=True)
 
         # --- Graphe 2 : Humidité et puissance de l’humidificateur ---
-        fig2, (ax2_rh, ax2_power) = plt.subplots(2, 1, sharex=True, figsize=(10, 6))
-
-        ax2_rh.plot(df['Time'], df['Target_RH'], label='Cible')
-        ax2_rh.plot(df['Time'], df['Sheath_RH'], label='Gaine')
-        ax2_rh.plot(df['Time'], df['Chamber_RH_avg'], label='Pièce')
-        ax2_rh.plot(df['Time'], df['Mobile_RH'], label='Larves')
-        ax2_rh.set_ylabel("Humidité (%)")
-        ax2_rh.set_title("Humidité et puissance de l’humidificateur dans le temps")
-        ax2_rh.legend()
-
-        ax2_power.plot(df['Time'], df['Humidifier_Power'], label='Puissance humidificateur', color='tab:blue')
-        ax2_power.set_ylabel("Puissance (Volt)")
-        ax2_power.set_xlabel("Temps")
-        ax2_power.legend()
-
-        fig2.autofmt_xdate()
+        add(go.Scattergl(**xy(df['Target_RH']), name='Cible (RH)'), 2)
+        add(go.Scattergl(**xy(df['Sheath_RH']), name='Gaine (RH)'), 2)
+        add(go.Scattergl(**xy(df['Chamber_RH_avg']), name='Pièce (RH)'), 2)
+        add(go.Scattergl(**xy(df['Mobile_RH']), name='Larves (RH)'), 2)
+        add(go.Scattergl(**xy(df['Humidifier_Power']), name='Puissance humidificateur',
+                         line=dict(color='blue')), 2, secondary_y=True)
+        fig.update_yaxes(title_text="Humidité (%)", row=2, col=1, secondary_y=False)
+        fig.update_yaxes(title_text="Puissance (Volt)", row=2, col=1, secondary_y=True)
 
         # --- Graphe 3 : Stratégie de recirculation ---
-        fig3, ax3 = plt.subplots()
-        ax3.plot(df['Time'], df['Total_CFM'], label='Total CFM')
-        ax3.plot(df['Time'], df['Recycling_Ratio'], label='Recirculation', linestyle='-')
-        ax3.plot(df['Time'], df['Intake_Temp'], label='Température Entrée', linestyle='-.')
-        ax3.plot(df['Time'], df['Intake_Hum'], label='Humidité Entrée', linestyle='-.')
-
-        ax3.set_ylabel("Ratios / Température / Humidité")
-        ax3.set_xlabel("Temps")
-        ax3.set_title("Stratégie de recirculation dans le temps")
-        ax3.legend()
-
-        fig3.autofmt_xdate()
+        add(go.Scattergl(**xy(df['Total_CFM']), name='Total CFM'), 3)
+        add(go.Scattergl(**xy(df['Recycling_Ratio']), name='Recirculation'), 3)
+        add(go.Scattergl(**xy(df['Intake_Temp']), name='Température Entrée',
+                         line=dict(dash='dashdot')), 3)
+        add(go.Scattergl(**xy(df['Intake_Hum']), name='Humidité Entrée',
+                         line=dict(dash='dashdot')), 3)
+        fig.update_yaxes(title_text="Ratios / Température / Humidité", row=3, col=1, secondary_y=False)
 
         # --- Graphe 4 : Ammoniac et Poids ---
-        fig4, ax4 = plt.subplots()
+        # Grille quasi régulière : fenêtres temporelles converties en nombre de points (pas médian)
+        pas = np.nanmedian(np.diff(t).astype("timedelta64[ns]").astype("int64")) / 1e9 if len(t) > 1 else np.nan
+        if not pas > 0:
+            pas = 20
 
         # Ammoniac avec lissage sur 1h
         if 'Ammonia' in df.columns:
-            ammonia_smoothed = df['Ammonia'].rolling("1h", center=True).mean()
-            ax4.plot(df['Time'], ammonia_smoothed, label="Ammoniac (moy. 1h)", color='tab:purple')
-            ax4.set_ylabel("Ammoniac (ppm)")
-            ax4.set_xlabel("Temps")
-            ax4.set_title("Évolution de l'ammoniac et du poids")
+            ammonia_smoothed = rolling_mean_centered(df['Ammonia'], 3600 / pas)
+            add(go.Scattergl(**xy(ammonia_smoothed), name="Ammoniac (moy. 1h)",
+                             line=dict(color='purple')), 4)
+            fig.update_yaxes(title_text="Ammoniac (ppm)", row=4, col=1, secondary_y=False)
         else:
             print("ℹ️ Colonne 'Ammonia' absente du fichier.")
 
         # Axe secondaire pour le poids
         if 'Weight' in df.columns:
-            ax4b = ax4.twinx()
-            poids = df['Weight'].rolling("2h", center=True).mean()
-            ax4b.plot(df['Time'], poids , label="Poids", color='tab:gray', linestyle='--')
-            ax4b.set_ylabel("Poids (kg)")
+            poids = rolling_mean_centered(df['Weight'], 2 * 3600 / pas)
+            add(go.Scattergl(**xy(poids), name="Poids",
+                             line=dict(color='gray', dash='dash')), 4, secondary_y=True)
+            fig.update_yaxes(title_text="Poids (kg)", row=4, col=1, secondary_y=True)
         else:
             print("ℹ️ Colonne 'Weight' absente du fichier.")
 
-        # Fusion des légendes
-        lines1, labels1 = ax4.get_legend_handles_labels()
-        lines2, labels2 = (ax4b.get_legend_handles_labels() if 'Weight' in df.columns else ([], []))
-        ax4.legend(lines1 + lines2, labels1 + labels2, loc='best')
-
-        fig4.autofmt_xdate()
+        fig.add_traces(traces, rows=rows, cols=[1] * len(traces), secondary_ys=secondary_ys)
+        fig.update_xaxes(title_text="Temps", row=4, col=1)
+        fig.update_layout(height=1400, showlegend=True)
 
-        # Afficher tous les graphiques
-        plt.show()
+        # Afficher la figure
+        fig.show()
 
     except Exception as e:
         print(f"❌ Une erreur s’est produite : {e}")
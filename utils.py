@@ -3,39 +3,126 @@ Résumé
 ------
 Fonctions utilitaires communes :
 - Détection de timestamp dans le *nom de fichier* (`extract_datetime_from_filename`).
-- Recherche du *dernier CSV* servi (multi‑IP) et gestion du *cache local*.
-- Aide au *fetch* de CSV et à la sélection manuelle d’un fichier.
+- Recherche du *dernier CSV* servi (multi‑IP) et gestion du *cache local* (dont les validateurs
+  ETag / Last-Modified des listings, `cached_data/server_index.json`).
+- Aide au *fetch* de CSV (téléchargement incrémental, dernière ligne incomplète ignorée, copie Parquet
+  du cache, `usecols` optionnel) et à la sélection manuelle d’un fichier.
+- Saisie validée d’un chemin de fichier / dossier (`prompt_path`).
+- Lecture rapide d’un CSV de test local (`read_data_csv` : capteurs en float32 ; avec pyarrow,
+  lecture en flux par blocs de 16 Mo via `read_csv_blocks`).
+- Chargement + préparation d’un test (`load_test_data` : temps absolu, moyennes chambre),
+  mis en cache Parquet dans `cached_data/` tant que le CSV ne change pas.
 - Annotation des *redémarrages* (sauts temporels) sur des figures Plotly.
+- Décimation min/max des séries avant tracé (`decimate_minmax`).
+- Moyenne glissante centrée en O(n) par sommes cumulées (`rolling_mean_centered`).
+- Moyenne de deux capteurs en NumPy, NaN ignorés (`mean_pair`).
+- Temps absolus depuis les secondes écoulées, arrondies en int64 (`times_from_seconds`).
 
 Conseils d’usage
 ----------------
 - Importer `extract_datetime_from_filename` pour reconstruire une échelle de temps absolue.
 - Utiliser `get_latest_csv_url` et `fetch_csv` pour simplifier la récupération des données.
 - `annotate_code_updates(fig, time_series)` ajoute des traits verticaux aux sauts > 120 s.
+- `decimate_minmax(x, y)` limite une trace à ~2000 points en conservant les extrema.
+- `to_webgl_arrays(x, y)` convertit x/y en tableaux compacts (float32, datetime64[ms]) pour Scattergl.
+- `rolling_mean_centered(values, window)` équivaut à `rolling(window, center=True, min_periods=1).mean()`.
+- `interpolate_inside(times_ns, values)` équivaut à `interpolate(method='time', limit_area='inside')`.
+- `fig.write_html(path, **HTML_EXPORT_OPTIONS)` écrit un HTML léger (plotly.js via CDN : connexion requise à l’ouverture).
 
 Dépendances
 -----------
-- `requests`, `pandas`, `beautifulsoup4` (pour l’analyse du listing HTTP), `plotly` (pour l’annotation).
+- `requests`, `pandas`, `numpy`, `plotly` (pour l’annotation) ; le listing HTTP est lu par regex.
+- `pyarrow` (optionnel) : moteur CSV multithread et cache Parquet utilisés s’il est installé.
 """
 
+import importlib.util
+import io
+import json
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
 from urllib.parse import urljoin
+import numpy as np
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from email.utils import parsedate_to_datetime
 
 
 # --- Extract timestamp from filename ---
+_FILENAME_TS_RE = re.compile(r"(\d{4})-(\d+)-(\d+)_([0-9]+)h([0-9]+)m([0-9]+)s")
+
 def extract_datetime_from_filename(filename):
-    match = re.search(r"(\d{4})-(\d+)-(\d+)_([0-9]+)h([0-9]+)m([0-9]+)s", filename)
+    # Plain datetime (cheaper than pd.Timestamp); still combines with pd.Timedelta / datetime Series
+    match = _FILENAME_TS_RE.search(filename)
     if match:
-        y, m, d, h, mi, s = map(int, match.groups())
-        return pd.Timestamp(year=y, month=m, day=d, hour=h, minute=mi, second=s)
+        return datetime(*map(int, match.groups()))
     return None
 
 
+# --- Fast CSV reading (pyarrow engine if installed, float32 sensor columns) ---
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+SENSOR_COLS = [
+    "Weight", "Ammonia",
+    "Target_T", "Sheath_T", "Chamber_top_T", "Chamber_bottom_T", "Mobile_T", "Intake_Temp",
+    "Target_RH", "Sheath_RH", "Chamber_top_RH", "Chamber_bottom_RH", "Mobile_RH", "Intake_Hum",
+    "Heater_Power", "Humidifier_Power",
+    "Total_CFM", "Target_airflow", "Target_Ratio", "Expected_Ratio", "Recycling_Ratio",
+]
+
+CSV_BLOCK_SIZE = 16 << 20  # pyarrow streaming reader: 16 MB blocks
+
+def read_csv_blocks(path, dtype, usecols=None):
+    # Stream the CSV in CSV_BLOCK_SIZE blocks (bounded parse buffers), typed columnar batches only
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={c: pa.float32() for c in dtype},
+            include_columns=usecols,
+        ),
+    )
+    return pa.Table.from_batches(list(reader), schema=reader.schema).to_pandas()
+
+def read_data_csv(path, usecols=None):
+    # `path` may also be a file-like buffer (e.g. io.BytesIO of a download): rewound before each read
+    rewind = getattr(path, "seek", lambda pos: None)
+
+    # Raw header names (may contain spaces) to map dtypes / dates before parsing
+    raw_cols = pd.read_csv(path, nrows=0).columns
+    if usecols is not None:  # other columns are skipped by the parser itself
+        raw_cols = [c for c in raw_cols if c.strip() in usecols]
+    dtype = {c: "float32" for c in raw_cols if c.strip() in SENSOR_COLS}
+    parse_dates = [c for c in raw_cols if c.strip() == "Absolute_Time"]
+
+    df = None
+    if HAS_PYARROW:
+        try:
+            rewind(0)
+            df = read_csv_blocks(path, dtype, usecols=None if usecols is None else raw_cols)
+        except Exception as e:  # e.g. type inferred on the first block no longer fits a later one
+            print(f"⚠️  Streaming CSV read failed, falling back to pandas: {e}")
+    if df is None:
+        rewind(0)
+        # No parse-time dtype: a stray non-numeric cell (e.g. "ERR") becomes NaN instead of failing the read
+        df = pd.read_csv(path, usecols=None if usecols is None else raw_cols,
+                         parse_dates=parse_dates, engine="c")
+        for c in dtype:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float32")
+    else:
+        for c in parse_dates:
+            df[c] = pd.to_datetime(df[c])
+    df.columns = df.columns.str.strip()
+    return df
+
+
 SERVER_ROOT_URLS = [
     "http://raspberrypi.local:8080",
     "http://172.20.202.52:8080",
@@ -45,58 +132,220 @@ SERVER_ROOT_URLS = [
 
 LOCAL_CACHE_FOLDER = "./cached_data"
 
-def get_latest_csv_url():
-    for server_root in SERVER_ROOT_URLS:
-        try:
-            response = requests.get(server_root, timeout=10)
-            response.raise_for_status()
+HEAD_WORKERS = 16  # concurrent HEAD requests when looking for the latest CSV
+HTTP_TIMEOUT = (1.5, 4)  # (connect, read) seconds: unreachable servers fail fast
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            csv_links = [a['href'] for a in soup.find_all('a', href=True) if a['href'].endswith('.csv')]
-            if not csv_links:
-                continue
+# Keep-alive session shared by listing, HEAD and CSV requests (TCP connections reused per host)
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=len(SERVER_ROOT_URLS), pool_maxsize=HEAD_WORKERS))
+
+# --- HTML export of figures: plotly.js from the CDN (≈3 MB less per file), no re-validation ---
+HTML_EXPORT_OPTIONS = dict(
+    include_plotlyjs="cdn", full_html=True, include_mathjax=False, validate=False,
+    config={"responsive": True},
+)
+
+
+# --- Load + prepare a local test CSV, with a Parquet cache keyed by mtime/size ---
+PROCESSED_CACHE_VERSION = 4  # bump when the preparation below changes
 
-            latest_file = None
-            latest_time = None
+def processed_cache_path(path):
+    stat = os.stat(path)
+    name = f"{os.path.basename(path)}.v{PROCESSED_CACHE_VERSION}.{stat.st_mtime:.0f}.{stat.st_size}.parquet"
+    return os.path.join(LOCAL_CACHE_FOLDER, name)
 
-            for href in csv_links:
-                file_url = urljoin(server_root, href)
-                head = requests.head(file_url, timeout=5)
-                last_modified = head.headers.get("Last-Modified")
+def load_test_data(path):
+    cache_path = processed_cache_path(path)
+    if HAS_PYARROW and os.path.isfile(cache_path):
+        return pd.read_parquet(cache_path, engine="pyarrow")
 
-                if last_modified:
-                    mod_time = parsedate_to_datetime(last_modified)
-                    if latest_time is None or mod_time > latest_time:
-                        latest_time = mod_time
-                        latest_file = file_url
+    df = read_data_csv(path)  # Absolute_Time déjà parsé s'il existe
 
-            if latest_file:
-                return latest_file, server_root
+    # --- Traitement du temps ---
+    if 'Absolute_Time' not in df.columns:
+        file_start_time = extract_datetime_from_filename(os.path.basename(path))
+        if file_start_time is None:
+            file_start_time = pd.Timestamp(0)
 
+        # +1 h (horloge du Pi), calcul vectorisé
+        base = file_start_time + pd.Timedelta(hours=1)
+        df["Absolute_Time"] = times_from_seconds(base, df["Timestamp"])
+
+    start_time = df['Absolute_Time'].min()
+    df['Elapsed_Hours'] = (df['Absolute_Time'] - start_time).dt.total_seconds() / 3600
+    df['Day'] = df['Elapsed_Hours'].floordiv(24).astype(int)
+
+    # --- Calcul des moyennes ---
+    df['Chamber_T_avg'] = mean_pair(df['Chamber_top_T'], df['Chamber_bottom_T'])
+    df['Chamber_RH_avg'] = mean_pair(df['Chamber_top_RH'], df['Chamber_bottom_RH'])
+
+    if HAS_PYARROW:
+        try:
+            os.makedirs(LOCAL_CACHE_FOLDER, exist_ok=True)
+            # Drop stale versions of this file's cache
+            prefix = os.path.basename(path) + ".v"
+            for old in os.listdir(LOCAL_CACHE_FOLDER):
+                if old.startswith(prefix) and old.endswith(".parquet"):
+                    os.remove(os.path.join(LOCAL_CACHE_FOLDER, old))
+            df.to_parquet(cache_path, engine="pyarrow", compression="zstd", index=False)
         except Exception as e:
-            print(f"⚠️  Failed with {server_root}: {e}")
+            print(f"⚠️  Parquet cache not written: {e}")
 
-    raise RuntimeError("❌ All server root URLs failed.")
+    return df
+
+# --- Listing validators (ETag / Last-Modified) per server, persisted in the local cache ---
+INDEX_CACHE_FILE = os.path.join(LOCAL_CACHE_FOLDER, "server_index.json")
+_INDEX_CACHE_LOCK = threading.Lock()
+
+def load_index_cache():
+    try:
+        with open(INDEX_CACHE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_index_entry(server_root, entry):
+    with _INDEX_CACHE_LOCK:  # servers are probed from several threads
+        cache = load_index_cache()
+        cache[server_root] = entry
+        try:
+            os.makedirs(LOCAL_CACHE_FOLDER, exist_ok=True)
+            with open(INDEX_CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Index cache not written: {e}")
+
+# `<a href="....csv">` links of an auto-generated directory listing (no HTML parser needed)
+_CSV_HREF_RE = re.compile(r"""href=["']([^"']+\.csv)["']""")
+
+def latest_csv_on_server(server_root):
+    # Latest CSV (by Last-Modified) listed by one server, or None if it serves no CSV
+    # Conditional GET: an unchanged listing (304) reuses the file chosen last time, no parsing / HEADs
+    cached = load_index_cache().get(server_root, {})
+    headers = {}
+    if cached.get("latest_file"):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = _SESSION.get(server_root, headers=headers, timeout=HTTP_TIMEOUT)
+    if response.status_code == 304:
+        return cached["latest_file"], server_root
+    response.raise_for_status()
+
+    csv_links = list(dict.fromkeys(_CSV_HREF_RE.findall(response.text)))  # dedup, listing order kept
+    if not csv_links:
+        return None
+
+    latest_file = None
+    latest_time = None
+
+    # HEAD requests fanned out in parallel (one RTT instead of one per file)
+    file_urls = [urljoin(server_root, href) for href in csv_links]
+    with ThreadPoolExecutor(max_workers=min(HEAD_WORKERS, len(file_urls))) as ex:
+        heads = ex.map(lambda u: _SESSION.head(u, timeout=HTTP_TIMEOUT).headers.get("Last-Modified"), file_urls)
+        for file_url, last_modified in zip(file_urls, heads):
+            if last_modified:
+                mod_time = parsedate_to_datetime(last_modified)
+                if latest_time is None or mod_time > latest_time:
+                    latest_time = mod_time
+                    latest_file = file_url
 
+    if not latest_file:
+        return None
+
+    etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    if etag or last_modified:
+        save_index_entry(server_root, {"etag": etag, "last_modified": last_modified, "latest_file": latest_file})
+    return latest_file, server_root
+
+def get_latest_csv_url():
+    # All servers probed in parallel: the first one that answers with a CSV wins
+    ex = ThreadPoolExecutor(max_workers=len(SERVER_ROOT_URLS))
+    try:
+        futures = {ex.submit(latest_csv_on_server, root): root for root in SERVER_ROOT_URLS}
+        for fut in as_completed(futures):
+            try:
+                result = fut.result()
+            except Exception as e:
+                print(f"⚠️  Failed with {futures[fut]}: {e}")
+                continue
+            if result:
+                return result
+    finally:
+        # Don't wait for slower / dead servers
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    raise RuntimeError("❌ All server root URLs failed.")
 
 def clear_terminal():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 
-def fetch_csv(csv_url):
+# --- Typed Parquet copy of the cached live CSV (zstd), preferred while it is up to date ---
+def write_parquet_copy(df, local_cache_file):
+    if HAS_PYARROW:
+        try:
+            df.to_parquet(local_cache_file + ".parquet", engine="pyarrow", compression="zstd", index=False)
+        except Exception as e:
+            print(f"⚠️  Parquet cache not written: {e}")
+
+def read_cached_csv(local_cache_file, usecols=None):
+    parquet_file = local_cache_file + ".parquet"
+    if (HAS_PYARROW and os.path.isfile(parquet_file)
+            and os.path.getmtime(parquet_file) >= os.path.getmtime(local_cache_file)):
+        import pyarrow.parquet as pq
+
+        # The copy may hold only the columns of an earlier `usecols`: use it only if it covers this one
+        wanted = [c.strip() for c in pd.read_csv(local_cache_file, nrows=0).columns
+                  if usecols is None or c.strip() in usecols]
+        if set(wanted) <= set(pq.read_schema(parquet_file).names):
+            return pd.read_parquet(parquet_file, engine="pyarrow", columns=wanted)
+    return read_live_csv(local_cache_file, usecols)
+
+# --- Live CSV (still being written by the Pi): parse complete rows only ---
+def read_live_csv(source, usecols=None):
+    # `source`: cached file path or downloaded bytes; a trailing half-written row is dropped
+    if not isinstance(source, bytes):
+        with open(source, "rb") as f:
+            source = f.read()
+    return read_data_csv(io.BytesIO(source[:source.rfind(b"\n") + 1] or source), usecols)
+
+def fetch_csv(csv_url, usecols=None):
     local_cache_file = os.path.join(LOCAL_CACHE_FOLDER, os.path.basename(csv_url))
     try:
-        response = requests.get(csv_url, timeout=5)
+        # Incremental refresh: ask only for the bytes appended since the cached copy (HTTP Range)
+        cached_size = os.path.getsize(local_cache_file) if os.path.isfile(local_cache_file) else 0
+        headers = {"Range": f"bytes={cached_size}-", "Accept-Encoding": "identity"} if cached_size else {}
+        response = _SESSION.get(csv_url, headers=headers, timeout=5)
+
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and content_range.startswith(f"bytes {cached_size}-"):
+            with open(local_cache_file, 'ab') as f:
+                f.write(response.content)
+            df = read_live_csv(local_cache_file, usecols)
+            write_parquet_copy(df, local_cache_file)
+            return df, "🌐 Live (HTTP)"
+        if response.status_code == 416 and content_range == f"bytes */{cached_size}":
+            return read_cached_csv(local_cache_file, usecols), "🌐 Live (HTTP)"  # nothing new since last time
+        if response.status_code in (206, 416):
+            # Range does not line up with the cache (file replaced / truncated): full download
+            response = _SESSION.get(csv_url, timeout=5)
+
         response.raise_for_status()
+        data = response.content  # downloaded once: parsed and cached from the same bytes
 
+        os.makedirs(LOCAL_CACHE_FOLDER, exist_ok=True)
         with open(local_cache_file, 'wb') as f:
-            f.write(response.content)
+            f.write(data)
 
-        df = pd.read_csv(csv_url)
+        df = read_live_csv(data, usecols)  # pyarrow engine + float32 sensor columns
+        write_parquet_copy(df, local_cache_file)
         return df, "🌐 Live (HTTP)"
     except Exception:
         try:
-            df = pd.read_csv(local_cache_file)
+            df = read_cached_csv(local_cache_file, usecols)  # Parquet copy if fresh, else the cached CSV
             return df, "💾 Fallback (Cached)"
         except Exception as cache_error:
             raise RuntimeError(f"❌ Failed to fetch from server and cache. {cache_error}")
@@ -108,31 +357,118 @@ def prompt_for_manual_url(server_root):
         return None
     return urljoin(server_root, filename)
 
+def prompt_path(message, must_be="file"):
+    # Ask until the path exists (file or folder); strips quotes and expands "~"
+    check = Path.is_file if must_be == "file" else Path.is_dir
+    error = "❌ Fichier introuvable. Veuillez réessayer." if must_be == "file" else "❌ Dossier introuvable. Veuillez réessayer."
+    while True:
+        p = Path(input(message).strip().strip('"').strip("'")).expanduser()
+        if check(p):
+            return str(p)
+        print(error)
+
 def annotate_code_updates(fig, time_series, threshold_seconds=120, label="Code update (reboot)"):
-    time_deltas = time_series.diff().dt.total_seconds()
-
-    for i, delta in enumerate(time_deltas):
-        if pd.notna(delta) and delta > threshold_seconds:
-            reboot_time = time_series.iloc[i]
-
-            # --- Vertical line across all subplots ---
-            fig.add_vline(
-                x=reboot_time,
-                line=dict(color="red", dash="dot", width=1),
-                layer="below",  # or "above"
-            )
-
-            # --- Single annotation outside the plotting area ---
-            fig.add_annotation(
-                x=reboot_time,
-                y=1.02,  # slightly above top of plot
-                xref="x",
-                yref="paper",
-                text=label,
-                showarrow=False,
-                bgcolor="lightyellow",
-                font=dict(size=10),
-                bordercolor="black",
-                borderwidth=1,
-                yanchor="bottom"
-            )
+    time_deltas = time_series.diff().dt.total_seconds().to_numpy()
+
+    # Reboot positions in one vectorized pass (NaN > x is False), then only K << N Plotly calls
+    for i in np.flatnonzero(time_deltas > threshold_seconds):
+        reboot_time = time_series.iat[i]
+
+        # --- Vertical line across all subplots ---
+        fig.add_vline(
+            x=reboot_time,
+            line=dict(color="red", dash="dot", width=1),
+            layer="below",  # or "above"
+        )
+
+        # --- Single annotation outside the plotting area ---
+        fig.add_annotation(
+            x=reboot_time,
+            y=1.02,  # slightly above top of plot
+            xref="x",
+            yref="paper",
+            text=label,
+            showarrow=False,
+            bgcolor="lightyellow",
+            font=dict(size=10),
+            bordercolor="black",
+            borderwidth=1,
+            yanchor="bottom"
+        )
+
+
+# --- Min/max decimation: keep each bucket's extrema so peaks survive downsampling ---
+def decimate_minmax(x, y, n_out=2000):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return x, y
+
+    n_bins = max(1, n_out // 2)
+    size = -(-n // n_bins)  # ceil
+    buckets = np.concatenate([y, np.full(n_bins * size - n, np.nan)]).reshape(n_bins, size)
+    nan = np.isnan(buckets)
+    lo = np.where(nan, np.inf, buckets).argmin(axis=1)
+    hi = np.where(nan, -np.inf, buckets).argmax(axis=1)
+
+    offsets = np.arange(n_bins) * size
+    idx = np.unique(np.concatenate([lo + offsets, hi + offsets, [0, n - 1]]))
+    idx = idx[idx < n]
+    return x[idx], y[idx]
+
+
+# --- Centered rolling mean via cumulative sums (same result as rolling(w, center=True, min_periods=1).mean()) ---
+def rolling_mean_centered(values, window):
+    v = np.asarray(values, dtype=float)
+    n = len(v)
+    window = max(1, int(window))
+    valid = ~np.isnan(v)
+    csum = np.concatenate([[0.0], np.cumsum(np.where(valid, v, 0.0))])
+    ccount = np.concatenate([[0], np.cumsum(valid)])
+
+    # Window [i - w//2, i + w - 1 - w//2], clipped to the series bounds
+    i = np.arange(n)
+    lo = np.clip(i - window // 2, 0, n)
+    hi = np.clip(i + window - window // 2, 0, n)
+    count = ccount[hi] - ccount[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (csum[hi] - csum[lo]) / count
+
+
+# --- Absolute times from elapsed seconds: rounded once to int64 seconds, NaN -> NaT ---
+def times_from_seconds(start, seconds):
+    secs = np.asarray(seconds, dtype=float)
+    nan = np.isnan(secs)
+    td = np.rint(np.where(nan, 0, secs)).astype("int64").astype("timedelta64[s]")
+    out = np.datetime64(start, "ns") + td
+    out[nan] = np.datetime64("NaT")
+    return out
+
+
+# --- Mean of two sensors in NumPy (same as df[[a, b]].mean(axis=1): a NaN falls back to the other value) ---
+def mean_pair(a, b):
+    a = np.asarray(a)
+    b = np.asarray(b)
+    out = (a + b) * 0.5
+    out = np.where(np.isnan(a), b, out)
+    return np.where(np.isnan(b), a, out)
+
+
+# --- Compact arrays for WebGL traces: float32 values, millisecond datetimes ---
+def to_webgl_arrays(x, y):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ms]")
+    return x, np.asarray(y, dtype=np.float32)
+
+
+# --- Linear interpolation in time, inside gaps only (same as interpolate(method='time', limit_area='inside')) ---
+def interpolate_inside(times_ns, values):
+    v = np.asarray(values, dtype=float)
+    valid = ~np.isnan(v)
+    if valid.sum() < 2:
+        return v
+    t = np.asarray(times_ns, dtype="int64")
+    t = (t - t[0]).astype(float)  # relative times keep full float precision
+    return np.interp(t, t[valid], v[valid], left=np.nan, right=np.nan)